@@ -5,11 +5,34 @@ Test Google Places MCP -> R2 Storage workflow using mcp-use
 2. Get place details and photo URLs
 3. Download photos and save to R2 storage
 4. Verify photos are stored in R2
+
+Sharded ingest mode spreads a destination list across worker processes (and
+machines) coordinated through a lease table in a shared SQLite file:
+
+    python test-places-to-r2-python.py seed --db ingest.db --destinations places.txt --shards 8
+    python test-places-to-r2-python.py run --db ingest.db --workers 4
+    python test-places-to-r2-python.py worker --db ingest.db --shard 5   # on another box
+    python test-places-to-r2-python.py report --db ingest.db
+
+The lease table uses SQLite's rollback journal, which relies only on file
+locks. Workers on other machines must see the same file on a filesystem whose
+locking SQLite can trust; many network filesystems get this wrong, so prefer a
+single host with `run --wal` (WAL mode needs shared memory and is never safe
+across machines) unless the shared mount is known to lock correctly.
 """
 
+import argparse
 import asyncio
+import hashlib
 import json
 import logging
+import multiprocessing
+import re
+import socket
+import sqlite3
+import threading
+import time
+import uuid
 from datetime import datetime
 import sys
 import os
@@ -184,8 +207,9 @@ class PlacesToR2WorkflowTester:
         logger.info(f"🔍 Verifying R2 upload: {object_key}")
 
         try:
+            # Filter on the exact key; list_objects caps results at 100 by default
             result = await self.r2_session.connector.call_tool("list_objects", {
-                "prefix": "test-photos/"
+                "prefix": object_key
             })
 
             logger.info(f"✅ R2 verification result: {result}")
@@ -203,68 +227,86 @@ class PlacesToR2WorkflowTester:
             logger.error(f"❌ Error verifying R2 upload: {e}")
             return {"success": False, "error": str(e)}
 
-    async def run_full_workflow(self):
-        """Run the complete workflow"""
-        logger.info("🚀 Starting Google Places -> R2 Storage workflow test")
-        logger.info("=" * 60)
-
-        try:
-            await self.setup()
-            await self.list_available_tools()
-
-            # Step 1: Find place
-            find_result = await self.test_find_place()
-            if not find_result["success"]:
-                logger.error("❌ Workflow failed at place search step")
-                return
+    async def ingest_destination(self, query="Eiffel Tower Paris", filename_prefix=None, log_todos=False):
+        """Run steps 1-5 for a single destination on already-open sessions"""
+        # Step 1: Find place
+        find_result = await self.test_find_place(query)
+        if not find_result["success"]:
+            return {"success": False, "step": "find_place", "message": "place search step",
+                    "error": find_result.get("error")}
 
-            # Update todo
+        if log_todos:
             logger.info("✅ Todo 1 completed: Search for place")
 
-            # Step 2: Get place details
-            details_result = await self.test_get_place_details(find_result["place_id"])
-            if not details_result["success"] or not details_result["photo_refs"]:
-                logger.error("❌ Workflow failed at place details step or no photos found")
-                return
+        # Step 2: Get place details
+        details_result = await self.test_get_place_details(find_result["place_id"])
+        if not details_result["success"] or not details_result["photo_refs"]:
+            return {"success": False, "step": "get_place_details",
+                    "message": "place details step or no photos found", "error": details_result.get("error")}
 
-            # Update todo
+        if log_todos:
             logger.info("✅ Todo 2 completed: Get place details and photo URLs")
 
-            # Step 3: Get photo data
-            photo_ref = details_result["photo_refs"][0]
-            photo_result = await self.test_get_photo_url(photo_ref)
-            if not photo_result["success"]:
-                logger.error("❌ Workflow failed at photo URL step")
-                return
-
-            # Step 4: Upload to R2
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"eiffel-tower-{timestamp}.jpg"
-            upload_result = await self.test_upload_to_r2(photo_result["base64_data"], filename)
-            if not upload_result["success"]:
-                logger.error("❌ Workflow failed at R2 upload step")
-                return
-
-            # Update todo
+        # Step 3: Get photo data
+        photo_ref = details_result["photo_refs"][0]
+        photo_result = await self.test_get_photo_url(photo_ref)
+        if not photo_result["success"]:
+            return {"success": False, "step": "get_place_photo_url", "message": "photo URL step",
+                    "error": photo_result.get("error")}
+
+        # Step 4: Upload to R2
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if filename_prefix is None:
+            filename_prefix = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "place"
+        filename = f"{filename_prefix}-{timestamp}.jpg"
+        upload_result = await self.test_upload_to_r2(photo_result["base64_data"], filename)
+        if not upload_result["success"]:
+            return {"success": False, "step": "upload_object", "message": "R2 upload step",
+                    "error": upload_result.get("error")}
+
+        if log_todos:
             logger.info("✅ Todo 3 completed: Download photos and save to R2 storage")
 
-            # Step 5: Verify upload
-            verify_result = await self.test_verify_r2_upload(upload_result["object_key"])
-            if not verify_result["success"]:
-                logger.error("❌ Workflow failed at R2 verification step")
-                return
+        # Step 5: Verify upload
+        verify_result = await self.test_verify_r2_upload(upload_result["object_key"])
+        if not verify_result["success"]:
+            return {"success": False, "step": "list_objects", "message": "R2 verification step",
+                    "error": verify_result.get("error")}
 
-            # Update todo
+        if log_todos:
             logger.info("✅ Todo 4 completed: Verify photos are properly stored in R2")
 
+        return {
+            "success": True,
+            "place_id": find_result["place_id"],
+            "place_name": find_result["place_name"],
+            "filename": filename,
+            "object_key": upload_result["object_key"],
+            "photo_url": photo_result["photo_url"],
+        }
+
+    async def run_full_workflow(self, query="Eiffel Tower Paris", filename_prefix="eiffel-tower"):
+        """Run the complete workflow"""
+        logger.info("🚀 Starting Google Places -> R2 Storage workflow test")
+        logger.info("=" * 60)
+
+        try:
+            await self.setup()
+            await self.list_available_tools()
+
+            result = await self.ingest_destination(query, filename_prefix=filename_prefix, log_todos=True)
+            if not result["success"]:
+                logger.error(f"❌ Workflow failed at {result['message']}")
+                return
+
             # Success!
             logger.info("")
             logger.info("🎉 Workflow completed successfully!")
             logger.info("=" * 60)
-            logger.info(f"📍 Place: {find_result['place_name']}")
-            logger.info(f"📸 Photo uploaded: {filename}")
-            logger.info(f"☁️ R2 Object Key: {upload_result['object_key']}")
-            logger.info(f"🌐 Photo URL: {photo_result['photo_url']}")
+            logger.info(f"📍 Place: {result['place_name']}")
+            logger.info(f"📸 Photo uploaded: {result['filename']}")
+            logger.info(f"☁️ R2 Object Key: {result['object_key']}")
+            logger.info(f"🌐 Photo URL: {result['photo_url']}")
             logger.info("=" * 60)
 
         except Exception as e:
@@ -275,10 +317,550 @@ class PlacesToR2WorkflowTester:
             if self.client:
                 await self.client.close_all_sessions()
 
+class LeaseTable:
+    """Lease/claim table for sharded ingest, backed by a shared SQLite file"""
+
+    def __init__(self, db_path, lease_seconds=120, max_attempts=3, retry_delay=30, wal=None, create=False):
+        if not create and not os.path.exists(db_path):
+            raise FileNotFoundError(f"Lease table {db_path} does not exist; run seed first")
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Keep lock waits well inside a heartbeat interval (lease_seconds / 3)
+        self.busy_timeout = max(1.0, min(30.0, lease_seconds / 6))
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        # WAL shares a -shm file through memory, so it is only safe on one host.
+        # wal=None keeps whatever mode the file already uses (workers joining, report).
+        if wal is not None:
+            self._set_journal_mode("wal" if wal else "delete")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                destination TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker_id TEXT,
+                lease_expires REAL,
+                not_before REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            );
+            -- Covers every claim step so each is an index seek in claim order
+            DROP INDEX IF EXISTS idx_leases_claim;
+            CREATE INDEX IF NOT EXISTS idx_leases_claim_order
+                ON leases (status, shard, attempts, destination);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                hostname TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                shard INTEGER NOT NULL,
+                lease_seconds REAL NOT NULL,
+                started_at REAL NOT NULL,
+                last_heartbeat REAL NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                lost INTEGER NOT NULL DEFAULT 0,
+                busy_seconds REAL NOT NULL DEFAULT 0
+            );
+        """)
+
+    @property
+    def conn(self):
+        """One connection per thread so calls can run via asyncio.to_thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def journal_mode(self):
+        return self.conn.execute("PRAGMA journal_mode").fetchone()[0].lower()
+
+    def _set_journal_mode(self, mode):
+        current = self.journal_mode
+        if current == mode:
+            return
+        try:
+            switched = self.conn.execute(f"PRAGMA journal_mode={mode}").fetchone()[0].lower()
+            reason = f"mode is still {switched}"
+        except sqlite3.OperationalError as e:
+            switched, reason = current, str(e)
+        if switched != mode:
+            raise RuntimeError(
+                f"{self.db_path} uses {current} journaling and could not be switched to {mode} "
+                f"while other processes have it open ({reason})"
+            )
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    @staticmethod
+    def normalize(destination):
+        """Canonical form used as both the lease key and the shard hash input"""
+        return " ".join(destination.split()).lower()
+
+    @staticmethod
+    def shard_for(destination, num_shards):
+        """Stable hash partition (builtin hash() is salted per process)"""
+        digest = hashlib.sha1(LeaseTable.normalize(destination).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % num_shards
+
+    @property
+    def num_shards(self):
+        """Shard count fixed at seed time, or None if the table was never seeded"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'num_shards'").fetchone()
+        return int(row["value"]) if row else None
+
+    def seed(self, destinations, num_shards):
+        """Insert destinations as pending work; existing rows are left untouched"""
+        if num_shards < 1:
+            raise ValueError(f"num_shards must be at least 1, got {num_shards}")
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            stored = self.num_shards
+            if stored is not None and stored != num_shards:
+                raise ValueError(
+                    f"{self.db_path} is already partitioned into {stored} shards; "
+                    f"re-seed with --shards {stored} or use a new database"
+                )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('num_shards', ?)",
+                (str(num_shards),),
+            )
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO leases (destination, shard) VALUES (?, ?)",
+                [(d, self.shard_for(d, num_shards)) for d in map(self.normalize, destinations) if d],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def register_worker(self, worker_id, shard):
+        now = time.time()
+        self.conn.execute(
+            """INSERT INTO workers (worker_id, hostname, pid, shard, lease_seconds, started_at, last_heartbeat)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (worker_id) DO UPDATE SET
+                   lease_seconds = excluded.lease_seconds, last_heartbeat = excluded.last_heartbeat""",
+            (worker_id, socket.gethostname(), os.getpid(), shard, self.lease_seconds, now, now),
+        )
+
+    def claim(self, worker_id, shard):
+        """Lease the next destination, preferring this worker's own shard.
+
+        Pending rows from other shards and leases whose holder stopped
+        heartbeating are picked up once the own shard is drained, so work owned
+        by a dead worker is not stranded. Retries wait out their backoff and
+        sort after destinations that have not been attempted yet.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A holder that died on its last attempt leaves nothing to retry
+            self.conn.execute(
+                """UPDATE leases
+                   SET status = 'failed', lease_expires = NULL, error = 'lease expired'
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, self.max_attempts),
+            )
+            row = self._next_claimable(shard, now)
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                """UPDATE leases
+                   SET status = 'leased', worker_id = ?, lease_expires = ?, not_before = NULL,
+                       attempts = attempts + 1, started_at = ?, error = NULL
+                   WHERE destination = ?""",
+                (worker_id, now + self.lease_seconds, now, row["destination"]),
+            )
+            self.conn.execute("COMMIT")
+            return row["destination"]
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _next_claimable(self, shard, now):
+        """Find the next row to lease; every step is a seek on idx_leases_claim_order"""
+        num_shards = self.num_shards or 1
+        # Visit other shards starting after our own so stealing workers spread out
+        others = [(shard + offset) % num_shards for offset in range(1, num_shards)]
+        due = "(not_before IS NULL OR not_before <= ?)"
+        steps = [
+            # Own shard: fresh rows sort first because attempts = 0
+            (f"status = 'pending' AND shard = ? AND attempts < ? AND {due} ORDER BY attempts, destination",
+             (shard, self.max_attempts, now)),
+        ]
+        # Other shards, fresh rows everywhere before any retries
+        steps += [
+            ("status = 'pending' AND shard = ? AND attempts = 0 ORDER BY destination", (other,))
+            for other in others
+        ]
+        steps += [
+            (f"status = 'pending' AND shard = ? AND attempts < ? AND {due} ORDER BY attempts, destination",
+             (other, self.max_attempts, now))
+            for other in others
+        ]
+        # Leases whose holder stopped heartbeating
+        steps.append((
+            "status = 'leased' AND attempts < ? AND lease_expires < ? ORDER BY shard, attempts, destination",
+            (self.max_attempts, now),
+        ))
+        for where, params in steps:
+            row = self.conn.execute(
+                f"SELECT destination FROM leases INDEXED BY idx_leases_claim_order WHERE {where} LIMIT 1",
+                params,
+            ).fetchone()
+            if row is not None:
+                return row
+        return None
+
+    def heartbeat(self, worker_id, destination=None):
+        """Record liveness and extend the lease on the destination in progress"""
+        now = time.time()
+        if destination is not None:
+            self.conn.execute(
+                """UPDATE leases SET lease_expires = ?
+                   WHERE destination = ? AND worker_id = ? AND status = 'leased'""",
+                (now + self.lease_seconds, destination, worker_id),
+            )
+        self.conn.execute(
+            "UPDATE workers SET last_heartbeat = ? WHERE worker_id = ?",
+            (now, worker_id),
+        )
+
+    def complete(self, worker_id, destination, result, elapsed):
+        now = time.time()
+        updated = self.conn.execute(
+            """UPDATE leases
+               SET status = 'done', finished_at = ?, lease_expires = NULL, result = ?
+               WHERE destination = ? AND worker_id = ? AND status = 'leased'""",
+            (now, json.dumps(result), destination, worker_id),
+        ).rowcount
+        self._record_outcome(worker_id, "completed" if updated == 1 else "lost", elapsed, now)
+        return updated == 1
+
+    def fail(self, worker_id, destination, error, elapsed):
+        """Release the lease; the row is retried with linear backoff until max_attempts"""
+        now = time.time()
+        updated = self.conn.execute(
+            """UPDATE leases
+               SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                   not_before = ? + ? * attempts,
+                   finished_at = ?, lease_expires = NULL, worker_id = NULL, error = ?
+               WHERE destination = ? AND worker_id = ? AND status = 'leased'""",
+            (self.max_attempts, now, self.retry_delay, now, error, destination, worker_id),
+        ).rowcount
+        self._record_outcome(worker_id, "failed" if updated == 1 else "lost", elapsed, now)
+        return updated == 1
+
+    def _record_outcome(self, worker_id, counter, elapsed, now):
+        """Bump a worker counter; lost leases are kept out of completed/failed"""
+        self.conn.execute(
+            f"""UPDATE workers
+                SET {counter} = {counter} + 1, busy_seconds = busy_seconds + ?, last_heartbeat = ?
+                WHERE worker_id = ?""",
+            (elapsed, now, worker_id),
+        )
+
+    def has_outstanding(self):
+        """True while any destination can still be claimed or is in flight"""
+        row = self.conn.execute(
+            """SELECT EXISTS (SELECT 1 FROM leases WHERE status = 'leased')
+                   OR EXISTS (SELECT 1 FROM leases WHERE status = 'pending' AND attempts < ?) AS n""",
+            (self.max_attempts,),
+        ).fetchone()
+        return bool(row["n"])
+
+    def report(self):
+        """Merged progress and metrics across all workers and hosts"""
+        now = time.time()
+        by_status = {
+            row["status"]: row["n"]
+            for row in self.conn.execute("SELECT status, COUNT(*) AS n FROM leases GROUP BY status")
+        }
+        by_shard = {}
+        for row in self.conn.execute(
+            "SELECT shard, status, COUNT(*) AS n FROM leases GROUP BY shard, status ORDER BY shard"
+        ):
+            by_shard.setdefault(row["shard"], {})[row["status"]] = row["n"]
+        workers = []
+        for row in self.conn.execute("SELECT * FROM workers ORDER BY hostname, worker_id"):
+            handled = row["completed"] + row["failed"] + row["lost"]
+            workers.append({
+                "worker_id": row["worker_id"],
+                "hostname": row["hostname"],
+                "pid": row["pid"],
+                "shard": row["shard"],
+                "completed": row["completed"],
+                "failed": row["failed"],
+                "lost": row["lost"],
+                "avg_seconds": round(row["busy_seconds"] / handled, 3) if handled else None,
+                # Judge liveness by the lease length this worker actually ran with
+                "alive": now - row["last_heartbeat"] < row["lease_seconds"],
+            })
+        span = self.conn.execute(
+            "SELECT MIN(started_at) AS first, MAX(finished_at) AS last FROM leases WHERE status = 'done'"
+        ).fetchone()
+        done = by_status.get("done", 0)
+        elapsed = (span["last"] - span["first"]) if span["first"] and span["last"] else 0
+        return {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_shard": by_shard,
+            "workers": workers,
+            "throughput_per_minute": round(done / elapsed * 60, 2) if elapsed > 0 else None,
+        }
+
+
+async def _heartbeat_loop(leases, worker_id, current, interval):
+    """Keep the lease in progress alive; give up only once it may already have lapsed"""
+    last_success = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(leases.heartbeat, worker_id, current["destination"])
+            last_success = time.monotonic()
+        except Exception as e:
+            logger.warning(f"⚠️ Heartbeat for {worker_id} failed: {e}")
+            if time.monotonic() - last_success >= leases.lease_seconds - interval:
+                raise
+
+
+def _check_heartbeat(task):
+    if task.done():
+        raise RuntimeError("Lease heartbeat stopped; aborting so leases are not processed twice") from task.exception()
+
+
+async def run_shard_worker(db_path, shard, lease_seconds=120, max_attempts=3, retry_delay=30,
+                           poll_seconds=5):
+    """Claim and ingest destinations until the lease table is drained"""
+    leases = LeaseTable(db_path, lease_seconds=lease_seconds, max_attempts=max_attempts, retry_delay=retry_delay)
+    num_shards = leases.num_shards
+    if num_shards is None:
+        leases.close()
+        raise RuntimeError(f"{db_path} has not been seeded; run seed first")
+    if not 0 <= shard < num_shards:
+        leases.close()
+        raise ValueError(f"shard must be between 0 and {num_shards - 1}, got {shard}")
+    # hostname:pid repeats across container restarts (pid 1), so add a random suffix
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    await asyncio.to_thread(leases.register_worker, worker_id, shard)
+    logger.info(f"👷 Worker {worker_id} started on shard {shard}/{num_shards}")
+
+    tester = PlacesToR2WorkflowTester()
+    current = {"destination": None}
+    heartbeat = asyncio.create_task(_heartbeat_loop(leases, worker_id, current, lease_seconds / 3))
+    try:
+        await tester.setup()
+        while True:
+            _check_heartbeat(heartbeat)
+            destination = await asyncio.to_thread(leases.claim, worker_id, shard)
+            if destination is None:
+                if not await asyncio.to_thread(leases.has_outstanding):
+                    break
+                # Remaining work is leased elsewhere or backing off; wait and retry
+                await asyncio.sleep(poll_seconds)
+                continue
+
+            logger.info(f"📥 {worker_id} claimed '{destination}'")
+            current["destination"] = destination
+            started = time.monotonic()
+            try:
+                result = await tester.ingest_destination(destination)
+            except Exception as e:
+                result = {"success": False, "step": "exception", "error": str(e)}
+            finally:
+                current["destination"] = None
+            elapsed = time.monotonic() - started
+            _check_heartbeat(heartbeat)
+
+            if result["success"]:
+                if not await asyncio.to_thread(leases.complete, worker_id, destination, result, elapsed):
+                    logger.warning(f"⚠️ Lease on '{destination}' was lost before completion")
+            else:
+                error = f"{result['step']}: {result.get('error') or 'no result'}"
+                logger.error(f"❌ '{destination}' failed at {error}")
+                await asyncio.to_thread(leases.fail, worker_id, destination, error, elapsed)
+    finally:
+        heartbeat.cancel()
+        if tester.client:
+            await tester.client.close_all_sessions()
+        leases.close()
+    logger.info(f"🏁 Worker {worker_id} finished")
+
+
+def _worker_process(db_path, shard, options):
+    asyncio.run(run_shard_worker(db_path, shard, **options))
+
+
+def run_local_workers(db_path, workers, wal=None, **options):
+    """Start worker processes spread over the seeded shards; returns how many failed"""
+    # Switch the journal once here; the workers join with whatever mode is set
+    leases = LeaseTable(db_path, wal=wal)
+    try:
+        num_shards = leases.num_shards
+    finally:
+        leases.close()
+    if num_shards is None:
+        raise RuntimeError(f"{db_path} has not been seeded; run seed first")
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker_process,
+            args=(db_path, index % num_shards, options),
+            name=f"places-to-r2-shard-{index % num_shards}",
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    failed = 0
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            failed += 1
+            logger.error(f"❌ {process.name} exited with code {process.exitcode}")
+    return failed
+
+
+def print_report(db_path):
+    leases = LeaseTable(db_path)
+    try:
+        print(json.dumps(leases.report(), indent=2))
+    finally:
+        leases.close()
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Google Places -> R2 Storage ingest")
+    subparsers = parser.add_subparsers(dest="command")
+
+    single = subparsers.add_parser("single", help="run the workflow for one place (default)")
+    single.add_argument("--query", default="Eiffel Tower Paris")
+    single.add_argument("--filename-prefix", help="defaults to a slug of the query")
+
+    seed = subparsers.add_parser("seed", help="load destinations into the lease table")
+    seed.add_argument("--db", required=True)
+    seed.add_argument("--destinations", required=True, help="file with one destination per line")
+    seed.add_argument("--shards", type=_positive_int, default=os.cpu_count() or 1)
+
+    for name, help_text in (("run", "start local worker processes"), ("worker", "start one worker")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--db", required=True)
+        sub.add_argument("--lease-seconds", type=float, default=120)
+        sub.add_argument("--max-attempts", type=_positive_int, default=3)
+        sub.add_argument("--retry-delay", type=float, default=30,
+                         help="seconds to wait before retrying, multiplied by the attempt count")
+        if name == "run":
+            sub.add_argument("--workers", type=_positive_int, default=os.cpu_count() or 1)
+            sub.add_argument("--wal", action=argparse.BooleanOptionalAction, default=None,
+                             help="switch to WAL (only safe when every worker is on this host) "
+                                  "or back to the rollback journal; default keeps the current mode")
+        else:
+            sub.add_argument("--shard", type=int, default=0)
+
+    report = subparsers.add_parser("report", help="print merged progress and metrics")
+    report.add_argument("--db", required=True)
+
+    return parser.parse_args(argv)
+
+
+def require_seeded(db_path):
+    """Exit with an error unless db_path holds a seeded lease table; returns its shard count"""
+    try:
+        leases = LeaseTable(db_path)
+    except FileNotFoundError as e:
+        sys.exit(f"❌ {e}")
+    try:
+        num_shards = leases.num_shards
+        journal_mode = leases.journal_mode
+    finally:
+        leases.close()
+    if num_shards is None:
+        sys.exit(f"❌ {db_path} has not been seeded; run seed first")
+    return num_shards, journal_mode
+
+
 async def main():
     """Main entry point"""
     tester = PlacesToR2WorkflowTester()
     await tester.run_full_workflow()
 
+
+def cli(argv=None):
+    args = parse_args(argv)
+    if args.command in ("run", "worker", "report"):
+        num_shards, journal_mode = require_seeded(args.db)
+
+    if args.command == "seed":
+        with open(args.destinations, encoding="utf-8") as f:
+            destinations = [line for line in map(str.strip, f) if line and not line.startswith("#")]
+        try:
+            # Only a brand-new file gets its journal mode set; never fight live workers
+            leases = LeaseTable(args.db, wal=False if not os.path.exists(args.db) else None, create=True)
+            try:
+                added = leases.seed(destinations, args.shards)
+            finally:
+                leases.close()
+        except (ValueError, RuntimeError, sqlite3.OperationalError) as e:
+            sys.exit(f"❌ {e}")
+        logger.info(f"🌱 Seeded {added} new destinations across {args.shards} shards")
+    elif args.command == "run":
+        try:
+            failed = run_local_workers(
+                args.db, args.workers, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts,
+                retry_delay=args.retry_delay, wal=args.wal,
+            )
+        except (RuntimeError, sqlite3.OperationalError) as e:
+            sys.exit(f"❌ {e}")
+        print_report(args.db)
+        if failed:
+            sys.exit(1)
+    elif args.command == "worker":
+        if not 0 <= args.shard < num_shards:
+            sys.exit(f"❌ --shard must be between 0 and {num_shards - 1}, got {args.shard}")
+        if journal_mode == "wal":
+            logger.warning(f"⚠️ {args.db} uses WAL journaling; only workers on the same host are safe")
+        asyncio.run(run_shard_worker(
+            args.db, args.shard, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts,
+            retry_delay=args.retry_delay,
+        ))
+    elif args.command == "report":
+        print_report(args.db)
+    elif args.command == "single":
+        asyncio.run(PlacesToR2WorkflowTester().run_full_workflow(args.query, filename_prefix=args.filename_prefix))
+    else:
+        asyncio.run(main())
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    cli()
@@ -0,0 +1,283 @@
+"""Tests for the sharded ingest lease table in test-places-to-r2-python.py"""
+
+import importlib.util
+import json
+import asyncio
+import os
+import sys
+import time
+import types
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, "test-places-to-r2-python.py")
+
+
+def _load_script():
+    # The script imports mcp_use at module level; LeaseTable does not need it
+    stubbed = "mcp_use" not in sys.modules
+    if stubbed:
+        stub = types.ModuleType("mcp_use")
+        stub.MCPClient = object
+        sys.modules["mcp_use"] = stub
+    try:
+        spec = importlib.util.spec_from_file_location("places_to_r2", SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        if stubbed:
+            del sys.modules["mcp_use"]
+
+
+places_to_r2 = _load_script()
+LeaseTable = places_to_r2.LeaseTable
+
+
+def _destinations_by_shard(num_shards, per_shard=2):
+    found = {shard: [] for shard in range(num_shards)}
+    index = 0
+    while any(len(names) < per_shard for names in found.values()):
+        name = f"city {index}"
+        shard = LeaseTable.shard_for(name, num_shards)
+        if len(found[shard]) < per_shard:
+            found[shard].append(name)
+        index += 1
+    return found
+
+
+def _expire(leases, destination):
+    leases.conn.execute(
+        "UPDATE leases SET lease_expires = ? WHERE destination = ?", (time.time() - 1, destination)
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ingest.db")
+
+
+@pytest.fixture
+def leases(db_path):
+    table = LeaseTable(db_path, lease_seconds=60, max_attempts=2, retry_delay=30, create=True)
+    yield table
+    table.close()
+
+
+def test_shard_for_is_stable_and_in_range():
+    assert LeaseTable.shard_for("Paris", 8) == LeaseTable.shard_for(" paris ", 8)
+    assert all(0 <= LeaseTable.shard_for(f"City {i}", 3) < 3 for i in range(50))
+
+
+def test_missing_database_is_not_created(db_path):
+    with pytest.raises(FileNotFoundError):
+        LeaseTable(db_path)
+    assert not os.path.exists(db_path)
+
+
+def test_unseeded_table_has_no_shard_count(leases):
+    assert leases.num_shards is None
+
+
+def test_seed_rejects_zero_shards(leases):
+    with pytest.raises(ValueError):
+        leases.seed(["paris"], 0)
+
+
+def test_reseed_keeps_partition(leases):
+    assert leases.seed(["paris", "rome"], 4) == 2
+    assert leases.seed(["paris", "lisbon"], 4) == 1
+    with pytest.raises(ValueError):
+        leases.seed(["madrid"], 2)
+    assert leases.num_shards == 4
+    assert leases.report()["total"] == 3
+
+
+def test_claim_prefers_own_shard_then_steals(leases):
+    by_shard = _destinations_by_shard(2)
+    leases.seed([d for names in by_shard.values() for d in names], 2)
+
+    claimed = [leases.claim("w0", 0) for _ in range(4)]
+    assert set(claimed[:2]) == set(by_shard[0])
+    assert set(claimed[2:]) == set(by_shard[1])
+    assert leases.claim("w0", 0) is None
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(leases):
+    leases.seed(["paris"], 1)
+    assert leases.claim("dead", 0) == "paris"
+    assert leases.claim("w1", 0) is None
+
+    _expire(leases, "paris")
+    assert leases.claim("w1", 0) == "paris"
+    assert not leases.complete("dead", "paris", {}, 1.0)
+    assert leases.complete("w1", "paris", {"object_key": "k"}, 1.0)
+    assert not leases.has_outstanding()
+
+
+def test_heartbeat_extends_lease(leases):
+    leases.seed(["paris"], 1)
+    leases.register_worker("w0", 0)
+    leases.claim("w0", 0)
+    _expire(leases, "paris")
+    leases.heartbeat("w0", "paris")
+    assert leases.claim("w1", 0) is None
+
+
+def test_failed_destination_backs_off_behind_fresh_work(leases):
+    by_shard = _destinations_by_shard(1, per_shard=2)
+    first, second = sorted(by_shard[0])
+    leases.seed([first, second], 1)
+
+    assert leases.claim("w0", 0) == first
+    leases.fail("w0", first, "rate limited", 0.5)
+    assert leases.claim("w0", 0) == second
+    assert leases.claim("w0", 0) is None
+    assert leases.has_outstanding()
+
+    leases.conn.execute("UPDATE leases SET not_before = ? WHERE destination = ?", (time.time() - 1, first))
+    assert leases.claim("w0", 0) == first
+
+
+def test_fresh_pending_sorts_before_due_retries(leases):
+    first, second = sorted(_destinations_by_shard(1)[0])
+    leases.seed([first, second], 1)
+    leases.conn.execute("UPDATE leases SET attempts = 1 WHERE destination = ?", (first,))
+    assert leases.claim("w0", 0) == second
+
+
+def test_max_attempts_marks_failed(leases):
+    leases.seed(["paris"], 1)
+    for attempt in range(2):
+        leases.conn.execute("UPDATE leases SET not_before = NULL")
+        assert leases.claim("w0", 0) == "paris"
+        leases.fail("w0", "paris", f"error {attempt}", 0.1)
+
+    assert leases.claim("w0", 0) is None
+    assert not leases.has_outstanding()
+    assert leases.report()["by_status"] == {"failed": 1}
+
+
+def test_expired_lease_on_last_attempt_is_failed(leases):
+    leases.seed(["paris"], 1)
+    leases.conn.execute("UPDATE leases SET attempts = 1")
+    assert leases.claim("dead", 0) == "paris"
+    _expire(leases, "paris")
+
+    assert leases.claim("w1", 0) is None
+    assert not leases.has_outstanding()
+    row = leases.conn.execute("SELECT status, error FROM leases").fetchone()
+    assert (row["status"], row["error"]) == ("failed", "lease expired")
+
+
+def test_report_uses_each_workers_lease_seconds(db_path, leases):
+    leases.seed(["paris"], 1)
+    short = LeaseTable(db_path, lease_seconds=30)
+    short.register_worker("short", 0)
+    leases.register_worker("long", 0)
+    stale = time.time() - 45
+    leases.conn.execute("UPDATE workers SET last_heartbeat = ?", (stale,))
+    short.close()
+
+    # A reader with a different lease length must not change the verdict
+    reader = LeaseTable(db_path, lease_seconds=600)
+    try:
+        alive = {w["worker_id"]: w["alive"] for w in reader.report()["workers"]}
+    finally:
+        reader.close()
+    assert alive == {"short": False, "long": True}
+
+
+def test_complete_records_result_and_metrics(leases):
+    leases.seed(["paris"], 1)
+    leases.register_worker("w0", 0)
+    leases.claim("w0", 0)
+    assert leases.complete("w0", "paris", {"object_key": "test-photos/paris.jpg"}, 2.0)
+
+    row = leases.conn.execute("SELECT result FROM leases").fetchone()
+    assert json.loads(row["result"]) == {"object_key": "test-photos/paris.jpg"}
+    worker = leases.report()["workers"][0]
+    assert (worker["completed"], worker["avg_seconds"]) == (1, 2.0)
+
+
+def test_seed_normalizes_destinations(leases):
+    assert leases.seed(["Paris", "paris", "  PARIS  ", "New  York"], 2) == 2
+    rows = leases.conn.execute("SELECT destination, shard FROM leases ORDER BY destination").fetchall()
+    assert [(r["destination"], r["shard"]) for r in rows] == [
+        ("new york", LeaseTable.shard_for("New York", 2)),
+        ("paris", LeaseTable.shard_for("paris", 2)),
+    ]
+
+
+def test_reregistered_worker_id_does_not_renew_orphaned_lease(leases):
+    leases.seed(["paris", "rome"], 1)
+    leases.register_worker("host:1", 0)
+    assert leases.claim("host:1", 0) == "paris"
+
+    # Restarted container reuses the id and heartbeats while idle or on other work
+    leases.register_worker("host:1", 0)
+    _expire(leases, "paris")
+    leases.heartbeat("host:1")
+    assert leases.claim("host:1", 0) == "rome"
+    leases.heartbeat("host:1", "rome")
+
+    assert leases.claim("w1", 0) == "paris"
+
+
+def test_lost_lease_is_not_counted_as_completed(leases):
+    leases.seed(["paris"], 1)
+    for worker_id in ("dead", "w1"):
+        leases.register_worker(worker_id, 0)
+    leases.claim("dead", 0)
+    _expire(leases, "paris")
+    leases.claim("w1", 0)
+
+    assert leases.complete("w1", "paris", {}, 1.0)
+    assert not leases.complete("dead", "paris", {}, 1.0)
+    assert not leases.fail("dead", "paris", "late", 1.0)
+    workers = {w["worker_id"]: w for w in leases.report()["workers"]}
+    assert sum(w["completed"] for w in workers.values()) == leases.report()["by_status"]["done"]
+    assert (workers["dead"]["completed"], workers["dead"]["failed"], workers["dead"]["lost"]) == (0, 0, 2)
+
+
+def test_claim_lookups_seek_the_index(leases):
+    by_shard = _destinations_by_shard(3)
+    leases.seed([d for names in by_shard.values() for d in names], 3)
+    leases.conn.execute("UPDATE leases SET status = 'done' WHERE shard = 0")
+
+    statements = []
+    leases.conn.set_trace_callback(statements.append)
+    try:
+        assert leases.claim("w0", 0) in by_shard[1]
+    finally:
+        leases.conn.set_trace_callback(None)
+
+    lookups = [sql for sql in statements if sql.lstrip().startswith("SELECT destination")]
+    assert lookups
+    for sql in lookups:
+        plan = " ".join(row[3] for row in leases.conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "idx_leases_claim_order" in plan and "TEMP B-TREE" not in plan, plan
+
+
+def test_worker_rejects_shard_outside_partition(leases, db_path):
+    leases.seed(["paris"], 2)
+    for shard in (-1, 2):
+        with pytest.raises(ValueError):
+            asyncio.run(places_to_r2.run_shard_worker(db_path, shard))
+
+
+def test_journal_mode_conflict_is_reported(db_path):
+    LeaseTable(db_path, wal=True, create=True).close()
+    other = LeaseTable(db_path, lease_seconds=6)
+    try:
+        other.conn.execute("BEGIN")
+        other.conn.execute("SELECT COUNT(*) FROM leases").fetchone()
+
+        joined = LeaseTable(db_path, lease_seconds=6)
+        assert joined.journal_mode == "wal"
+        joined.close()
+        with pytest.raises(RuntimeError):
+            LeaseTable(db_path, lease_seconds=6, wal=False)
+    finally:
+        other.conn.execute("ROLLBACK")
+        other.close()